@@ -84,163 +84,145 @@
 
 import sqlite3
 import os
+from enum import IntEnum
 
-species = {
-    'black' : {
-        'species_id' : 0,
-        'index_to_state' : [ 'empty', 'unexcited', 'excited' ],
-        'state_to_index' : {
-            'empty' : 0,
-            'unexcited' : 1,
-            'excited' : 2
-        }
-    },
-
-    'red' : {
-        'species_id' : 1,
-        'index_to_state' : [ 'nothing', 'occupied' ],
-        'state_to_index' : {
-            'nothing' : 0,
-            'occupied' : 1
-        }
-    }
-}
-
-sites = {}
-
-
-index = 0
-for i in range(10):
-    for j in range(10):
-        for k in range(10):
-            if (i + j + k) % 2 == 0:
-                site_species = 'black'
-            else:
-                site_species = 'red'
+import numpy as np
 
-            site = {
-                'site_id' : index,
-                'x' : float(i),
-                'y' : float(j),
-                'z' : float(k),
-                'species' : site_species
-            }
 
-            sites[index] = site
+class Species(IntEnum):
+    black = 0
+    red = 1
 
-            index += 1
+class BlackState(IntEnum):
+    empty = 0
+    unexcited = 1
+    excited = 2
 
+class RedState(IntEnum):
+    nothing = 0
+    occupied = 1
 
-one_site_interactions = {
-    'black' : [
-        {
-            'interaction_id' : 0,
-            'number_of_sites' : 1,
-            'left_state' : 'unexcited',
-            'right_state' : 'excited',
-            'rate' : 1.0
-        }
-    ],
-
-    'red' : []
+species_states = {
+    Species.black : BlackState,
+    Species.red : RedState
 }
 
-two_site_interactions = {
-    ('black', 'black') : [
-        {
-            'interaction_id' : 1,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'excited',
-            'left_state_2'   : 'empty',
-            'right_state_1'  : 'empty',
-            'right_state_2'  : 'unexcited',
-            'rate'           : 1.0
-        },
-
-        {
-            'interaction_id' : 2,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'empty',
-            'left_state_2'   : 'excited',
-            'right_state_1'  : 'unexcited',
-            'right_state_2'  : 'empty',
-            'rate'           : 1.0
-        },
-
-    ],
-
-    ('black', 'red') : [
-        {
-            'interaction_id' : 3,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'unexcited',
-            'left_state_2'   : 'occupied',
-            'right_state_1'  : 'excited',
-            'right_state_2'  : 'nothing',
-            'rate'           : 1.0
-        },
-        {
-            'interaction_id' : 4,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'excited',
-            'left_state_2'   : 'nothing',
-            'right_state_1'  : 'unexcited',
-            'right_state_2'  : 'occupied',
-            'rate'           : 1.0
-        },
-    ],
-
-    ('red', 'black') : [
-        {
-            'interaction_id' : 5,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'occupied',
-            'left_state_2'   : 'unexcited',
-            'right_state_1'  : 'nothing',
-            'right_state_2'  : 'excited',
-            'rate'           : 1.0
-        },
-        {
-            'interaction_id' : 6,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'nothing',
-            'left_state_2'   : 'excited',
-            'right_state_1'  : 'occupied',
-            'right_state_2'  : 'unexcited',
-            'rate'           : 1.0
-        },
-    ],
-
-    ('red', 'red') : [
-        {
-            'interaction_id' : 7,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'occupied',
-            'left_state_2'   : 'nothing',
-            'right_state_1'  : 'nothing',
-            'right_state_2'  : 'occupied',
-            'rate'           : 1.0
-        },
-        {
-            'interaction_id' : 8,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'nothing',
-            'left_state_2'   : 'occupied',
-            'right_state_1'  : 'occupied',
-            'right_state_2'  : 'nothing',
-            'rate'           : 1.0
-        },
-        {
-            'interaction_id' : 9,
-            'number_of_sites' : 2,
-            'left_state_1'   : 'occupied',
-            'left_state_2'   : 'occupied',
-            'right_state_1'  : 'nothing',
-            'right_state_2'  : 'nothing',
-            'rate'           : 1.0
-        }
-    ]
-}
+# sites live on a 10x10x10 grid. Rows are generated in (i,j,k)
+# lexicographic order, so the site_id of (i,j,k) has a closed form and
+# no lookup table is needed. Works elementwise on arrays of indices.
+def site_index(i, j, k):
+    return 100 * i + 10 * j + k
+
+site_coords = np.indices((10, 10, 10)).reshape(3, -1).T
+number_of_sites = len(site_coords)
+
+# site table rows, stored as a structured array whose fields match the
+# columns of the sites table.
+sites = np.empty(number_of_sites, dtype=[('site_id', np.int64),
+                                         ('x', np.float64),
+                                         ('y', np.float64),
+                                         ('z', np.float64),
+                                         ('species_id', np.int64)])
+sites['site_id'] = site_index(*site_coords.T)
+sites['x'], sites['y'], sites['z'] = site_coords.T
+# the parity of i + j + k is the low bit of i ^ j ^ k, which is exactly
+# the species id (black = 0, red = 1).
+sites['species_id'] = np.bitwise_xor.reduce(site_coords, axis=1) & 1
+
+
+# interactions are stored as dense rate tensors indexed by species and
+# state ids. Entries which are zero are not interactions. Interaction ids
+# are assigned consecutively in index order of the tensors, one site
+# interactions first.
+max_number_of_states = max(len(states) for states in species_states.values())
+
+# one site rates are indexed by [species, left_state, right_state]
+one_site_rates = np.zeros((len(Species),) + (max_number_of_states,) * 2)
+
+# heating
+one_site_rates[Species.black,
+               BlackState.unexcited, BlackState.excited] = 1.0
+
+# two site rates are indexed by
+# [species_1, species_2, left_state_1, left_state_2,
+#  right_state_1, right_state_2]
+two_site_rates = np.zeros((len(Species), len(Species)) +
+                          (max_number_of_states,) * 4)
+
+# only one direction of each two site interaction is declared. The
+# mirror image, with the roles of the two sites swapped, is filled in
+# below so that both directions end up in the database.
+
+# black motion. requires energy
+two_site_rates[Species.black, Species.black,
+               BlackState.excited, BlackState.empty,
+               BlackState.empty, BlackState.unexcited] = 1.0
+
+# black absorbing red
+two_site_rates[Species.black, Species.red,
+               BlackState.unexcited, RedState.occupied,
+               BlackState.excited, RedState.nothing] = 1.0
+# black emitting red
+two_site_rates[Species.black, Species.red,
+               BlackState.excited, RedState.nothing,
+               BlackState.unexcited, RedState.occupied] = 1.0
+
+# red motion. free
+two_site_rates[Species.red, Species.red,
+               RedState.occupied, RedState.nothing,
+               RedState.nothing, RedState.occupied] = 1.0
+# radiation
+two_site_rates[Species.red, Species.red,
+               RedState.occupied, RedState.occupied,
+               RedState.nothing, RedState.nothing] = 1.0
+
+two_site_rates = np.maximum(two_site_rates,
+                            two_site_rates.transpose(1, 0, 3, 2, 5, 4))
+
+# the tables above are flattened once into structured arrays whose
+# fields match the columns of the species and interactions tables.
+species_table = np.array(
+    [ (s, len(species_states[s])) for s in Species ],
+    dtype=[('species_id', np.int64),
+           ('degrees_of_freedom', np.int64)])
+
+one_site_index = np.argwhere(one_site_rates > 0)
+two_site_index = np.argwhere(two_site_rates > 0)
+
+interactions = np.empty(
+    len(one_site_index) + len(two_site_index),
+    dtype=[('interaction_id', np.int64),
+           ('number_of_sites', np.int64),
+           ('species_id_1', np.int64),
+           ('species_id_2', np.int64),
+           ('left_state_1', np.int64),
+           ('left_state_2', np.int64),
+           ('right_state_1', np.int64),
+           ('right_state_2', np.int64),
+           ('rate', np.float64)])
+interactions['interaction_id'] = np.arange(len(interactions))
+
+# the columns are filled straight from the tensor indices, so no per row
+# tuples are built. Both slices are views into interactions.
+one_site = interactions[:len(one_site_index)]
+one_site['number_of_sites'] = 1
+(one_site['species_id_1'],
+ one_site['left_state_1'],
+ one_site['right_state_1']) = one_site_index.T
+one_site['species_id_2'] = -1
+one_site['left_state_2'] = -1
+one_site['right_state_2'] = -1
+one_site['rate'] = one_site_rates[tuple(one_site_index.T)]
+
+two_site = interactions[len(one_site_index):]
+two_site['number_of_sites'] = 2
+(two_site['species_id_1'],
+ two_site['species_id_2'],
+ two_site['left_state_1'],
+ two_site['left_state_2'],
+ two_site['right_state_1'],
+ two_site['right_state_2']) = two_site_index.T
+two_site['rate'] = two_site_rates[tuple(two_site_index.T)]
 
 create_species_table_sql = """
     CREATE TABLE species (
@@ -301,10 +283,41 @@ insert_metadata_sql = """
 
 os.system('rm -rf ./scratch; mkdir scratch')
 
+# the test databases are rebuilt from scratch on every run, so durability
+# is traded for insert speed. page_size must be set before any table is
+# created for it to take effect.
+bulk_load_pragmas = [
+    'PRAGMA page_size = 65536;',
+    'PRAGMA journal_mode = OFF;',
+    'PRAGMA synchronous = OFF;',
+    'PRAGMA temp_store = MEMORY;',
+    'PRAGMA locking_mode = EXCLUSIVE;'
+]
+
+# transactions are managed explicitly with BEGIN and COMMIT, so the
+# sqlite3 module is told not to open any of its own.
+def open_scratch_database(path):
+    con = sqlite3.connect(path, isolation_level=None)
+    for pragma in bulk_load_pragmas:
+        con.execute(pragma)
+    return con
+
+# the generated databases are deterministic, so each one is also written
+# out as a sql script. Consumers can rebuild a database from it with
+# sqlite3.connect(path).executescript(open(script_path).read())
+# instead of rerunning this file.
+def dump_scratch_database(con, script_path):
+    with open(script_path, 'w') as f:
+        for line in con.iterdump():
+            f.write(line + '\n')
+
 def setup_nanoparticle_database():
-    con = sqlite3.connect('./scratch/np.sqlite')
+    con = open_scratch_database('./scratch/np.sqlite')
     cur = con.cursor()
 
+    # everything is written in a single transaction, committed at the end
+    cur.execute('BEGIN')
+
     # create tables
     cur.execute(create_species_table_sql)
     cur.execute(create_sites_table_sql)
@@ -312,77 +325,23 @@ def setup_nanoparticle_database():
     cur.execute(create_metadata_table_sql)
 
     # insert species
-    for s in species:
-        cur.execute(insert_species_sql,
-                    ( species[s]['species_id'],
-                      len(species[s]['index_to_state'])))
-
-    con.commit()
+    cur.executemany(insert_species_sql, species_table.tolist())
 
     # insert sites
-    for site_id in sites:
-        site_data = sites[site_id]
-        cur.execute(insert_site_sql,
-                    ( site_data['site_id'],
-                      site_data['x'],
-                      site_data['y'],
-                      site_data['z'],
-                      species[site_data['species']]['species_id']))
-
-    con.commit()
-
-    number_of_interactions = 0
-    # inserting single site interactions
-    for s in one_site_interactions:
-        for interaction_data in one_site_interactions[s]:
-            number_of_interactions += 1
-            cur.execute(insert_interaction_sql,
-                        ( interaction_data['interaction_id'],
-                          interaction_data['number_of_sites'],
-                          species[s]['species_id'],
-                          -1,
-                          species[s]['state_to_index'][
-                              interaction_data['left_state']],
-                          -1,
-                          species[s]['state_to_index'][
-                              interaction_data['right_state']],
-                          -1,
-                          interaction_data['rate']))
-
-    con.commit()
-
-    # inserting two site interactions
-    for (s1,s2) in two_site_interactions:
-        for interaction_data in two_site_interactions[(s1,s2)]:
-            number_of_interactions += 1
-            cur.execute(insert_interaction_sql,
-                        ( interaction_data['interaction_id'],
-                          interaction_data['number_of_sites'],
-                          species[s1]['species_id'],
-                          species[s2]['species_id'],
-                          species[s1]['state_to_index'][
-                              interaction_data['left_state_1']
-                          ],
-                          species[s2]['state_to_index'][
-                              interaction_data['left_state_2']
-                          ],
-                          species[s1]['state_to_index'][
-                              interaction_data['right_state_1']
-                          ],
-                          species[s2]['state_to_index'][
-                              interaction_data['right_state_2']
-                          ],
-                          interaction_data['rate']))
-
-    con.commit()
+    cur.executemany(insert_site_sql, sites.tolist())
+
+    # insert interactions
+    cur.executemany(insert_interaction_sql, interactions.tolist())
 
     # insert metadata
     cur.execute(insert_metadata_sql,
-                ( len(species),
+                ( len(species_table),
                   len(sites),
-                  number_of_interactions))
+                  len(interactions)))
 
-    con.commit()
+    cur.execute('COMMIT')
+    dump_scratch_database(con, './scratch/np.sql')
+    con.close()
 
 
 create_initial_state_table_sql = """
@@ -420,40 +379,34 @@ insert_factors_sql = """
 """
 
 def setup_initial_state_database():
-    con = sqlite3.connect('./scratch/initial_state.sqlite')
+    con = open_scratch_database('./scratch/initial_state.sqlite')
     cur = con.cursor()
 
+    # everything is written in a single transaction, committed at the end
+    cur.execute('BEGIN')
 
     cur.execute(create_initial_state_table_sql)
     cur.execute(create_trajectories_table_sql)
     cur.execute(create_factors_table_sql)
     cur.execute(insert_factors_sql, (1.0,1.0,3.0))
-    con.commit()
-
-
-    for index in sites:
-        site_data = sites[index]
-        site_id = site_data['site_id']
-        x = site_data['x']
-        y = site_data['y']
-        z = site_data['z']
-        s = site_data['species']
-        if s == 'black':
-            if ((x + y + z < 5.0) or (x + y + z >= 25.0)):
-                cur.execute(
-                    insert_initial_state_sql,
-                    (site_id, species[s]['state_to_index']['unexcited']))
-            else:
-                 cur.execute(
-                    insert_initial_state_sql,
-                    (site_id, species[s]['state_to_index']['empty']))
-
-        if s == 'red':
-            cur.execute(
-                insert_initial_state_sql,
-                (site_id, species[s]['state_to_index']['nothing']))
-
-        con.commit()
+
+    coordinate_sums = site_coords.sum(axis=1)
+    black_states = np.where(
+        (coordinate_sums < 5) | (coordinate_sums >= 25),
+        BlackState.unexcited,
+        BlackState.empty)
+
+    initial_states = np.where(
+        sites['species_id'] == Species.black,
+        black_states,
+        RedState.nothing)
+
+    cur.executemany(insert_initial_state_sql,
+                    zip(sites['site_id'].tolist(), initial_states.tolist()))
+
+    cur.execute('COMMIT')
+    dump_scratch_database(con, './scratch/initial_state.sql')
+    con.close()
 
 
 
@@ -3,7 +3,7 @@ from typing import Optional, Tuple, Dict, List
 
 import numpy as np
 from collections import Counter
-from functools import lru_cache
+from functools import cached_property, lru_cache
 import os
 import json
 from monty.json import MontyDecoder
@@ -26,8 +26,7 @@ class SimulationReplayer():
             self.npmc_input.nanoparticle.generate()
         return self.npmc_input.nanoparticle.dopant_sites
     
-    @property
-    @lru_cache(maxsize=1)
+    @cached_property
     def npmc_input(self):
         with open(self.npmc_input_file, 'rb') as f:
             npmc_input = json.load(f, cls=MontyDecoder)
@@ -79,38 +78,33 @@ class SimulationReplayer():
                 simulation_time[seed] = time
                 
                 # Add this event to the statistics
-                try:
-                    event_statistics[seed][interaction_id] += 1
-                except:
-                    try:
-                        event_statistics[seed][interaction_id] = 1
-                    except:
-                        # Seed has not been seen before. Initialize all the necessary stuff
-                        event_statistics[seed] = {interaction_id: 1}
+                seed_statistics = event_statistics.setdefault(seed, {})
+                seed_statistics[interaction_id] = seed_statistics.get(interaction_id, 0) + 1
                         
                 # Keep track of the populations
-                try:
-                    # Check if the state needs to be saved
-                    while (save_i := simulation_time[seed] // step_size) >= len(x[seed]):
-
-                        self.save_populations(states, seed, len(x[seed])*step_size, x, population_evolution, site_evolution, step_size)
-                        
-                    #Try to update the state of this seed. If it fails, setup a new state 
-                    self.update_state(states, row, state_map_species_id)
-                except:
+                if seed not in states:
+                    # Seed has not been seen before. Set up its initial state
                     states[seed] = np.zeros((len(self.initial_states), self.npmc_input.spectral_kinetics.total_n_levels))
                     for i, (state, site) in enumerate(zip(self.initial_states, self.sites)):
                         _state = state_map_species_name[str(site.specie)][state]
                         states[seed][i, _state] = 1
-                    
+
                     self.save_populations(states, seed, 0, x, population_evolution, site_evolution, step_size)
-                    while (save_i := simulation_time[seed] // step_size) >= len(x[seed]):
-                        self.save_populations(states, seed, len(x[seed])*step_size, x, population_evolution, site_evolution, step_size)
-                    self.update_state(states, row, state_map_species_id)
+
+                # Check if the state needs to be saved
+                while (save_i := simulation_time[seed] // step_size) >= len(x[seed]):
+                    self.save_populations(states, seed, len(x[seed])*step_size, x, population_evolution, site_evolution, step_size)
+
+                self.update_state(states, row, state_map_species_id)
 
             # Do one final save for each seed
             for seed in simulation_time.keys():
                 self.save_populations(states, seed, len(x[seed])*step_size, x, population_evolution, site_evolution, step_size)
+
+        # Stack the recorded rows of each seed into (n_time_intervals, ...) arrays
+        for seed in simulation_time.keys():
+            population_evolution[seed] = np.vstack(population_evolution[seed])
+            site_evolution[seed] = np.vstack(site_evolution[seed])
         return simulation_time, event_statistics, x, population_evolution, site_evolution
     
     def update_state(self, states, row, state_map_species_id):
@@ -135,14 +129,16 @@ class SimulationReplayer():
                 state_map_species_id[_interaction['species_id_2']][_interaction['right_state_2']]] = 1
     
     def save_populations(self, states, seed, time, x, population_evolution, site_evolution, step_size):
-        try:
-            x[seed].append(time)
-            population_evolution[seed] = np.vstack([population_evolution[seed], np.sum(states[seed], axis=0)])
-            site_evolution[seed] = np.vstack([site_evolution[seed], np.where(states[seed] > 0)[1]])
-        except:
+        # Rows are appended to lists here and stacked into arrays once at the end of run(),
+        # rather than copying the whole history with np.vstack on every save
+        if seed not in x:
             x[seed] = [0]
-            population_evolution[seed] = np.sum(states[seed], axis=0)
-            site_evolution[seed] = np.where(states[seed] > 0)[1]
+            population_evolution[seed] = [np.sum(states[seed], axis=0)]
+            site_evolution[seed] = [np.where(states[seed] > 0)[1]]
+        else:
+            x[seed].append(time)
+            population_evolution[seed].append(np.sum(states[seed], axis=0))
+            site_evolution[seed].append(np.where(states[seed] > 0)[1])
 
     def calculate_dndt(self, 
                        data: Optional[Tuple[Dict, Dict, Dict, Dict]]=None):
@@ -192,20 +188,20 @@ class SimulationReplayer():
 
         population_by_constraint = self._population_evolution_by_constraint(site_evolution)
 
+        # The nanoparticle description is shared by every trajectory, so it is only built once
+        dopant_amount = {}
+        for dopant in self.npmc_input.nanoparticle.dopant_sites:
+            specie = str(dopant.specie)
+            dopant_amount[specie] = dopant_amount.get(specie, 0) + 1
+        c = Composition(dopant_amount)
+        nanostructure = '-'.join(["core" if i == 0 else "shell" for i, _ in enumerate(self.npmc_input.nanoparticle.constraints)])
+        nanostructure_size = '-'.join(
+            [f"{int(max(c.bounding_box()))}A_core" if i == 0 else f"{int(max(c.bounding_box()))}A_shell" for i, c in
+            enumerate(self.npmc_input.nanoparticle.constraints)])
+        formula_by_constraint = get_formula_by_constraint(self.npmc_input.nanoparticle)
+
         results = []
         for seed in simulation_time.keys():
-            dopant_amount = {}
-            for dopant in self.npmc_input.nanoparticle.dopant_sites:
-                try:
-                    dopant_amount[str(dopant.specie)] += 1
-                except:
-                    dopant_amount[str(dopant.specie)] = 1
-            c = Composition(dopant_amount)
-            nanostructure = '-'.join(["core" if i == 0 else "shell" for i, _ in enumerate(self.npmc_input.nanoparticle.constraints)])
-            nanostructure_size = '-'.join(
-                [f"{int(max(c.bounding_box()))}A_core" if i == 0 else f"{int(max(c.bounding_box()))}A_shell" for i, c in
-                enumerate(self.npmc_input.nanoparticle.constraints)])
-            formula_by_constraint = get_formula_by_constraint(self.npmc_input.nanoparticle)
             _d = {'simulation_seed': seed,
                 'dopant_seed': self.npmc_input.nanoparticle.seed,
                 'simulation_length': int(np.sum([event_statistics[seed][key] for key in event_statistics[seed]])),
@@ -217,13 +213,13 @@ class SimulationReplayer():
                 'nanostructure': nanostructure,
                 'nanostructure_size': nanostructure_size,
                 'total_n_levels': self.npmc_input.spectral_kinetics.total_n_levels,
-                'formula_by_constraint': formula_by_constraint,
+                'formula_by_constraint': list(formula_by_constraint),
                 'dopants': [str(dopant.symbol) for dopant in self.npmc_input.spectral_kinetics.dopants],
                 'dopant_concentration': self.npmc_input.nanoparticle._dopant_concentration,
                 'overall_dopant_concentration': self.npmc_input.nanoparticle.dopant_concentrations,
                 'excitation_power': self.npmc_input.spectral_kinetics.excitation_power,
                 'excitation_wavelength': self.npmc_input.spectral_kinetics.excitation_wavelength,
-                'dopant_composition': dopant_amount,
+                'dopant_composition': dict(dopant_amount),
                 }
 
             # Add the input parameters to the trajectory document
@@ -258,41 +254,45 @@ class SimulationReplayer():
         population_by_constraint = {}
         sites = np.array([site.coords for site in self.npmc_input.nanoparticle.dopant_sites])
         species_names = np.array([str(site.specie) for site in self.npmc_input.nanoparticle.dopant_sites])
+        n_levels = self.npmc_input.spectral_kinetics.total_n_levels
+
+        # The layer each site belongs to and the per-layer normalization do not depend on the seed,
+        # so they are computed once here rather than for every trajectory.
+        # Get the indices for dopants within each constraint
+        # A site belongs to the first constraint whose bounds contain it
+        site_indices_by_constraint = []
+        in_previous_constraint = np.zeros(len(sites), dtype=bool)
+        for constraint in self.npmc_input.nanoparticle.constraints:
+            in_constraint = constraint.sites_in_bounds(sites)
+            site_indices_by_constraint.append(np.where(in_constraint & ~in_previous_constraint)[0])
+            in_previous_constraint |= in_constraint
+
+        normalization_factors_by_constraint = []
+        for site_indices in site_indices_by_constraint:
+            species_counter = Counter(species_names[site_indices])
+
+            # Normalize values, so that the max population is 1
+            normalization_factors = np.hstack([[species_counter[dopant.symbol]] * dopant.n_levels for dopant in
+                                               self.npmc_input.spectral_kinetics.dopants])
+            # Avoid divide by zero by making normalization factor = 1 for elements not in the shell
+            normalization_factors[normalization_factors == 0] = 1
+            normalization_factors_by_constraint.append(normalization_factors)
 
         for seed, site_evolution in site_evolution_dict.items():
-
-            # Get the indices for dopants within each constraint
-            site_indices_by_constraint = []
-            for constraint in self.npmc_input.nanoparticle.constraints:
-
-                indices_inside_constraint = set(np.where(constraint.sites_in_bounds(sites))[0])
-
-                for l in site_indices_by_constraint:
-                    indices_inside_constraint = indices_inside_constraint - set(l)
-                site_indices_by_constraint.append(sorted(list(indices_inside_constraint)))
-
             _population_by_constraint = []
-            for n, _ in enumerate(self.npmc_input.nanoparticle.constraints):
-                site_indices = site_indices_by_constraint[n]
+            for site_indices, normalization_factors in zip(site_indices_by_constraint,
+                                                           normalization_factors_by_constraint):
                 layer_site_evolution = site_evolution[:, site_indices]
-                species_counter = Counter(species_names[site_indices])
 
                 # Set the shape of the array
                 n_time_intervals = layer_site_evolution.shape[0]
-                n_levels = self.npmc_input.spectral_kinetics.total_n_levels
-                layer_population = np.zeros((n_time_intervals, n_levels))
-
-                # Iterate through the time intervals and bin the energy levels
-                for i, _l in enumerate(layer_site_evolution):
-                    c = Counter(_l)
-                    for key in c:
-                        layer_population[i, int(key)] += c[key]
-
-                # Normalize values, so that the max population is 1
-                normalization_factors = np.hstack([[species_counter[dopant.symbol]] * dopant.n_levels for dopant in
-                                                self.npmc_input.spectral_kinetics.dopants])
-                # Avoid divide by zero by making normalization factor = 1 for elements not in the shell
-                normalization_factors[normalization_factors == 0] = 1
+
+                # Bin the energy levels of all time intervals at once. Offsetting each interval by
+                # n_levels gives every (interval, level) pair its own bin in a single bincount.
+                offsets = np.arange(n_time_intervals)[:, None] * n_levels
+                layer_population = np.bincount((layer_site_evolution.astype(int) + offsets).ravel(),
+                                                minlength=n_time_intervals * n_levels)
+                layer_population = layer_population.reshape(n_time_intervals, n_levels).astype(float)
                 layer_population = np.divide(layer_population, normalization_factors)
 
                 # Add to the list of populations separated by layer
@@ -121,7 +121,7 @@ create_interupt_cutoff_sql = """
 """
 
 from monty.json import MSONable
-from functools import lru_cache
+from functools import cached_property
 
 class NPMCInput(MSONable):
 
@@ -178,20 +178,17 @@ class NPMCInput(MSONable):
         else:
             self.initial_states = initial_states
 
-    @property
-    @lru_cache
+    @cached_property
     def interactions(self):
         return get_all_interactions(self.spectral_kinetics)
 
-    @property
-    @lru_cache
+    @cached_property
     def sites(self):
         if self.nanoparticle.has_structure == False:
             self.nanoparticle.generate()
         return get_sites(self.nanoparticle, self.spectral_kinetics)
 
-    @property
-    @lru_cache
+    @cached_property
     def species(self):
         return get_species(self.spectral_kinetics)
 
@@ -89,7 +89,7 @@ def npmc_job(constraints: Sequence[NanoParticleConstraint],
         # Check if the inputs match
         with sqlite3.connect(files['np_db_path']) as con:
             cur = con.cursor()
-            num_dopant_site_db = len(list(cur.execute('SELECT * from sites')))
+            num_dopant_site_db = cur.execute('SELECT count(*) from sites').fetchone()[0]
             num_dopant_sites = len(nanoparticle.dopant_sites)
             if num_dopant_sites != num_dopant_site_db:
                 raise RuntimeError('Existing run found, num sites does not match. Simulation must begin from scratch')
@@ -98,7 +98,7 @@ def npmc_job(constraints: Sequence[NanoParticleConstraint],
 
         with sqlite3.connect(files['np_db_path']) as con:
             cur = con.cursor()
-            num_interactions_db = len(list(cur.execute('SELECT * from interactions')))
+            num_interactions_db = cur.execute('SELECT count(*) from interactions').fetchone()[0]
             num_interactions = len(get_all_interactions(spectral_kinetics))
             if num_interactions != num_interactions_db:
                 raise RuntimeError('Existing run found, number of interactions does not match. Simulation must begin from scratch')
@@ -250,10 +250,8 @@ class DopedNanoparticle(MSONable):
 
             dopant_amount = {}
             for dopant in self.dopant_sites:
-                try:
-                    dopant_amount[str(dopant.specie)] += 1
-                except:
-                    dopant_amount[str(dopant.specie)] = 1
+                specie = str(dopant.specie)
+                dopant_amount[specie] = dopant_amount.get(specie, 0) + 1
 
             return dict([(key, item / total_num_sites) for key, item in dopant_amount.items()])
 
@@ -5,7 +5,7 @@ import numpy as np
 from NanoParticleTools.inputs.constants import *
 from NanoParticleTools.inputs.photo_physics import *
 from scipy.integrate import BDF, OdeSolver
-from functools import lru_cache
+from functools import cached_property
 from monty.json import MSONable
 
 class SpectralKinetics(MSONable):
@@ -139,8 +139,7 @@ class SpectralKinetics(MSONable):
 
         return mpr_rates, mpa_rates
 
-    @property
-    @lru_cache
+    @cached_property
     def non_radiative_rate_matrix(self) -> np.ndarray:
         """
         Makes the n x n M_NRrate matrix.  M_NRrate[i][j] gives the rate of non-radiative decay from level i->j,
@@ -171,8 +170,7 @@ class SpectralKinetics(MSONable):
 
         return non_radiative_rates[1:self.total_n_levels + 1, 1:self.total_n_levels + 1]
 
-    @property
-    @lru_cache
+    @cached_property
     def line_strength_matrix(self) -> np.ndarray:
         """
         makes the n x n lineStrengthMatrix from a wave of lineStrengths labeled with the transitions "i->j" in transitionLabels wave
@@ -190,8 +188,7 @@ class SpectralKinetics(MSONable):
 
         return combined_line_strength_matrix
 
-    @property
-    @lru_cache
+    @cached_property
     def radiative_rate_matrix(self) -> np.ndarray:
         """
 
@@ -247,8 +244,7 @@ class SpectralKinetics(MSONable):
 
         return rad_rates
 
-    @property
-    @lru_cache
+    @cached_property
     def magnetic_dipole_rate_matrix(self) -> np.ndarray:
         """
         creates the MDradRate matrix containing the MD line strength in cm^2 from intermediate coupling coefficient vectors
@@ -318,8 +314,7 @@ class SpectralKinetics(MSONable):
                             magnetic_dipole_radiative_rates[combined_i][combined_j] = absorption_rate
         return magnetic_dipole_radiative_rates
 
-    @property
-    @lru_cache
+    @cached_property
     def energy_transfer_rate_matrix(self) -> List[List[float]]:
         """
         makes the phonon assisted (not migration assisted)  energy transfer rate constant waves (W_ETrates, W_ETIndices)
@@ -157,13 +157,16 @@ def get_all_interactions(sk):
 
 
 def get_sites(nanoparticle, sk):
+    # Map each dopant symbol to its species id once, rather than rebuilding the symbol list for every site
+    species_ids = {dopant.symbol: i for i, dopant in enumerate(sk.dopants)}
+
     sites = {}
     for i, site in enumerate(nanoparticle.dopant_sites):
         sites[i] = {'site_id': i,
                     'x': site.x/10,
                     'y': site.y/10,
                     'z': site.z/10,
-                    'species_id': [dopant.symbol for dopant in sk.dopants].index(site.specie.symbol)}
+                    'species_id': species_ids[site.specie.symbol]}
     return sites
 
 
@@ -180,14 +183,13 @@ def get_formula_by_constraint(nanoparticle):
     species_names = np.array([str(site.specie) for site in nanoparticle.dopant_sites])
 
     # Get the indices for dopants within each constraint
+    # A site belongs to the first constraint whose bounds contain it
     site_indices_by_constraint = []
+    in_previous_constraint = np.zeros(len(sites), dtype=bool)
     for constraint in nanoparticle.constraints:
-
-        indices_inside_constraint = set(np.where(constraint.sites_in_bounds(sites))[0])
-
-        for l in site_indices_by_constraint:
-            indices_inside_constraint = indices_inside_constraint - set(l)
-        site_indices_by_constraint.append(sorted(list(indices_inside_constraint)))
+        in_constraint = constraint.sites_in_bounds(sites)
+        site_indices_by_constraint.append(np.where(in_constraint & ~in_previous_constraint)[0])
+        in_previous_constraint |= in_constraint
 
     formula_by_constraint = []
     for indices in site_indices_by_constraint:
@@ -4,7 +4,7 @@ from pathlib import Path
 import os
 from typing import Optional, List
 import numpy as np
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 
 SPECIES_DATA_PATH = os.path.join(str(Path(__file__).absolute().parent), 'data')
@@ -89,46 +89,39 @@ class Dopant(MSONable):
 
         return species_data
 
-    @property
-    @lru_cache
+    @cached_property
     def energy_levels(self):
         return [EnergyLevel(self.symbol, i, j) for i, j in
                                    zip(self.species_data()['EnergyLevelLabels'], self.species_data()['EnergyLevels'])]
 
-    @property
-    @lru_cache
+    @cached_property
     def absFWHM(self):
         return self.species_data()['absFWHM']
 
 
-    @property
-    @lru_cache
+    @cached_property
     def slj(self):
         return np.array(self.species_data()['SLJ'])
 
-    @property
-    @lru_cache
+    @cached_property
     def judd_ofelt_parameters(self):
         if 'JO_params' not in self.species_data():
             return []
         return self.species_data()['JO_params']
 
-    @property
-    @lru_cache
+    @cached_property
     def intermediate_coupling_coefficients(self):
         if 'intermediateCouplingCoeffs' not in self.species_data():
             return []
         return np.array(self.species_data()['intermediateCouplingCoeffs'])
 
-    @property
-    @lru_cache
+    @cached_property
     def eigenvector_sl(self):
         if 'eigenvectorSL' not in self.species_data():
             return []
         return np.array(self.species_data()['eigenvectorSL'])
 
-    @property
-    @lru_cache
+    @cached_property
     def transitions(self):
         energy_level_map = dict([(_el.label, _el) for _el in self.energy_levels])
         energy_level_label_map = dict([(_el.label, i) for i, _el in enumerate(self.energy_levels)])